@@ -1,61 +1,213 @@
 #!/usr/bin/env python3
 from __future__ import annotations
-from collections import Counter
 import argparse
+import hashlib
+import os
 import shutil
 import subprocess
 import sys
 import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import Optional
+from typing import Callable, Iterator, Optional
 from lxml import etree as ET
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
 
-def merge_catalog_xml(file_a: Path, file_b: Path, out_file: Path) -> None:
-    """Merge two SC2 catalog XML files node-by-node and child-by-child."""
-    parser = ET.XMLParser(remove_blank_text=True)
+# SC2 catalogs need no ID table nor entity expansion; huge_tree allows very long text nodes.
+_XML_PARSER_OPTIONS = dict(remove_blank_text=True, huge_tree=True, collect_ids=False, resolve_entities=False)
+_XML_PARSER = ET.XMLParser(**_XML_PARSER_OPTIONS)
 
-    def safe_parse(file: Path) -> Optional[ET._Element]:
-        if not file.exists():
-            return None
+_FICLONE = 0x40049409  # Linux ioctl sharing the data blocks on btrfs/XFS
+_reflink_supported = fcntl is not None
+
+
+def fast_copy(src: Path, dst: Path) -> None:
+    """
+    Copy file contents, as a reflink when the filesystem supports it.
+    Otherwise shutil.copyfile, which uses sendfile where available.
+    Like shutil.copyfile, raises SameFileError instead of truncating src when dst is src.
+    """
+    global _reflink_supported
+    if same_file(src, dst):
+        raise shutil.SameFileError(f"{src!r} and {dst!r} are the same file")
+    if _reflink_supported:
         try:
-            return ET.parse(str(file), parser).getroot()
-        except ET.XMLSyntaxError:
-            print(f"⚠️  Skipping invalid XML: {file}")
-            return None
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            return
+        except OSError:
+            _reflink_supported = False
+    shutil.copyfile(src, dst)
 
-    root_a = safe_parse(file_a)
-    root_b = safe_parse(file_b)
 
-    if root_a is None and root_b is not None:
-        out_file.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy(file_b, out_file)
-        return
-    elif root_b is None and root_a is not None:
-        out_file.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy(file_a, out_file)
-        return
-    elif root_a is None and root_b is None:
-        return
+def same_file(a: Path, b: Path) -> bool:
+    """True when both paths name the same existing file."""
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
 
-    merged = ET.Element(root_a.tag, root_a.attrib)
+
+def iter_catalog_children(file: Path) -> Iterator[ET._Element]:
+    """
+    Stream the top-level children of a catalog XML file, comments included.
+    Each child is detached from the root once parsed, so memory holds one entry at a time.
+    """
+    depth = 0
+    for event, elem in ET.iterparse(str(file), events=("start", "end", "comment"), **_XML_PARSER_OPTIONS):
+        if event == "start":
+            depth += 1
+            continue
+        if event == "end":
+            depth -= 1
+        if depth == 1:
+            elem.getparent().remove(elem)
+            yield elem
+
+
+def parse_catalog(file: Path) -> Optional[ET._Element]:
+    """Parse a catalog XML file, or return None when it is not valid XML."""
+    try:
+        return ET.parse(str(file), _XML_PARSER).getroot()
+    except ET.XMLSyntaxError:
+        print(f"⚠️  Skipping invalid XML: {file}")
+        return None
+
+
+def merge_catalog_into(root: ET._Element, file: Path) -> int:
+    """
+    Merge the entries of a catalog XML file into root, node-by-node and child-by-child.
+    Returns the number of entries read from file.
+    """
     by_id: dict[str, ET._Element] = {}
 
-    for child in root_a:
+    for child in root:
         cid = child.attrib.get("id")
         if cid:
             by_id[cid] = child
-        merged.append(child)
 
-    for child_b in root_b:
-        cid = child_b.attrib.get("id")
-        if cid in by_id:
-            merge_xml_children_nodes(by_id[cid], child_b)
+    # Entries with an id not in root are appended, later duplicates included.
+    append = root.append
+    existing = by_id.get
+    count = 0
+    for child in iter_catalog_children(file):
+        count += 1
+        target = existing(child.attrib.get("id"))
+        if target is not None:
+            # A fresh digest cache per entry, so hashed override subtrees are freed with the entry.
+            merge_xml_children_nodes(target, child, {})
         else:
-            merged.append(child_b)
+            append(child)
+    return count
+
+
+def merge_catalog_files(files: list[Path], out_file: Path) -> None:
+    """
+    Merge SC2 catalog XML files into out_file, lowest priority first.
+    Every file is parsed once and the result written once; a single file is copied.
+    """
+    files = [f for f in files if f.exists()]
+    # Merging a file into an identical copy of itself changes nothing.
+    while len(files) > 1 and same_content(files[0], files[1]):
+        files.pop(1)
+
+    while files:
+        if len(files) == 1:
+            copy_catalog(files[0], out_file)
+            return
+
+        root = parse_catalog(files[0])
+        # A bare root tag adds nothing, the next layer becomes the base.
+        if root is None or (len(root) == 0 and not root.attrib):
+            files.pop(0)
+            continue
+
+        invalid = None
+        entries = 0
+        for file in files[1:]:
+            try:
+                entries += merge_catalog_into(root, file)
+            except ET.XMLSyntaxError:
+                invalid = file
+                break
+
+        if invalid is None:
+            if entries:
+                stream_write(root, out_file)
+            else:
+                # Only skeleton overrides: root is still the base file.
+                copy_catalog(files[0], out_file)
+            return
+
+        # root already holds part of the invalid file, start over without it.
+        print(f"⚠️  Skipping invalid XML: {invalid}")
+        files.remove(invalid)
 
+
+def copy_catalog(src: Path, out_file: Path) -> None:
+    """Copy an unchanged base catalog to out_file; merging in place leaves it as is."""
+    if same_file(src, out_file):
+        return
+    out_file.parent.mkdir(parents=True, exist_ok=True)
+    fast_copy(src, out_file)
+
+
+def same_content(a: Path, b: Path) -> bool:
+    """Cheap size check first, then compare content digests (memoized per path)."""
+    return a.stat().st_size == b.stat().st_size and _file_digest(a) == _file_digest(b)
+
+
+_FILE_DIGESTS: dict[Path, bytes] = {}
+
+
+def _file_digest(path: Path) -> bytes:
+    digest = _FILE_DIGESTS.get(path)
+    if digest is None:
+        digest = hashlib.blake2b(path.read_bytes(), digest_size=16).digest()
+        _FILE_DIGESTS[path] = digest
+    return digest
+
+
+def stream_write(root: ET._Element, out_file: Path) -> None:
+    """
+    Serialize a catalog one top-level child at a time (same layout as pretty_print).
+    Mixed content is left unformatted by pretty_print but not by ET.indent, so such
+    trees are written in one pretty_print pass instead.
+    """
     out_file.parent.mkdir(parents=True, exist_ok=True)
-    ET.ElementTree(merged).write(str(out_file), encoding="utf-8", pretty_print=True, xml_declaration=True)
+    if has_mixed_content(root):
+        ET.ElementTree(root).write(str(out_file), encoding="utf-8", pretty_print=True, xml_declaration=True)
+        return
+    with out_file.open("wb") as f:
+        with ET.xmlfile(f, encoding="UTF-8") as xf:
+            xf.write_declaration()
+            if len(root) == 0:
+                xf.write(root, with_tail=False)
+            else:
+                with xf.element(root.tag, root.attrib):
+                    for child in root:
+                        xf.write("\n  ")
+                        if isinstance(child.tag, str):
+                            ET.indent(child, "  ", level=1)
+                        xf.write(child, with_tail=False)
+                    xf.write("\n")
+        f.write(b"\n")
+
+
+def has_mixed_content(root: ET._Element) -> bool:
+    """True when an element with children also holds text, its own or as a child's tail."""
+    for el in root.iter():
+        if len(el) and (el.text or any(c.tail for c in el)):
+            return True
+    return False
+
+
+_IDENTITY_ATTRIBUTES = ("id", "index", "value")
 
 
 def xml_identity_key(node: ET._Element):
@@ -63,71 +215,124 @@ def xml_identity_key(node: ET._Element):
     Determine a stable identity for SC2 XML.
     """
     a = node.attrib
+    get = a.get
 
-    if "id" in a:
-        return ("id", node.tag, a["id"])
-    if "index" in a:
-        return ("index", node.tag, a["index"])
-    if "value" in a:
-        return ("value", node.tag, a["value"])
+    # Interned tags make key_map lookups compare by identity; lxml hands out a new str each time.
+    for name in _IDENTITY_ATTRIBUTES:
+        value = get(name)
+        if value is not None:
+            return (name, sys.intern(node.tag), value)
     if a:
-        return ("attrs", node.tag, tuple(sorted(a.items())))
-    return ("unique", None)  # None because we won't use object id for uniqueness check here
-
-def element_signature(node: ET._Element):
-    tag = node.tag
-    attrib_tuple = tuple(sorted(node.attrib.items()))
-    text = (node.text.strip() if node.text and node.text.strip() else None)
-
-    child_sigs = []
-    for c in node:
-        child_sigs.append(element_signature(c))
+        return ("attrs", sys.intern(node.tag), tuple(sorted(a.items())))
+    return ("unique", None)  # uniques are matched by element_signature instead
 
-    children_counter = Counter(child_sigs)
 
-    children_counter_tuple = tuple(sorted(children_counter.items()))
+_DIGEST_MASK = (1 << 160) - 1
 
-    return (tag, attrib_tuple, text, children_counter_tuple)
 
-def merge_xml_children_nodes(target: ET._Element, source: ET._Element) -> None:
+def element_signature(node: ET._Element, cache: dict[ET._Element, bytes]) -> bytes:
+    """
+    SHA1 digest of a subtree (tag, attributes, text and children, ignoring child order).
+    Digests are memoized in cache so every subtree is hashed at most once. The cache
+    is keyed by element rather than id() so lxml keeps the same proxy alive for it.
+    """
+    digest = cache.get(node)
+    if digest is not None:
+        return digest
+
+    # Collect the uncached part of the subtree with an explicit stack; already hashed
+    # subtrees are not walked again. Every node is collected before its children, so
+    # the reversed order hashes children first.
+    order = []
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        order.append(n)
+        stack.extend(c for c in n if c not in cache)
+
+    for n in reversed(order):
+        h = hashlib.sha1()
+        tag = n.tag if isinstance(n.tag, str) else "!" + n.tag.__name__  # comments, PIs
+        h.update(tag.encode())
+        h.update(b"\0")
+        for k, v in sorted(n.attrib.items()):
+            h.update(k.encode())
+            h.update(b"\0")
+            h.update(v.encode())
+            h.update(b"\0")
+        text = n.text.strip() if n.text else None
+        if text:
+            h.update(b"\1")
+            h.update(text.encode())
+        h.update(b"\0")
+        # Children form a multiset: add their digests (mod 2**160) instead of sorting them.
+        # Unlike XOR, a sum does not cancel out pairs of identical children.
+        acc = 0
+        for c in n:
+            acc += int.from_bytes(cache[c], "big")
+        h.update(len(n).to_bytes(4, "big"))
+        h.update((acc & _DIGEST_MASK).to_bytes(20, "big"))
+        cache[n] = h.digest()
+
+    return cache[node]
+
+def merge_xml_children_nodes(
+        target: ET._Element,
+        source: ET._Element,
+        cache: Optional[dict[ET._Element, bytes]] = None,
+) -> None:
     """
     Merge sub-elements and attributes of matching XML nodes.
+    Identical subtrees are detected by signature and the target copy is kept as is.
     """
-    for k, v in source.attrib.items():
-        target.attrib[k] = v
+    if cache is None:
+        cache = {}
+
+    # Only hash when the cheap checks cannot tell the two subtrees apart.
+    if (len(target) == len(source) and target.attrib == source.attrib
+            and element_signature(target, cache) == element_signature(source, cache)):
+        return
+    # target is about to change, so its digest is no longer valid.
+    cache.pop(target, None)
+
+    target.attrib.update(source.attrib)
+
+    # Local bindings for the calls made once per child below.
+    append = target.append
+    identity_key = xml_identity_key
+    signature = element_signature
 
     key_map: dict[tuple, list[ET._Element]] = {}
+    key_map_get = key_map.get
+    key_map_setdefault = key_map.setdefault
+    # Attribute-less children are only hashed once a source child with the same tag needs them.
+    uniques: dict[str, list[ET._Element]] = {}
+    unique_by_tag: dict[str, set[bytes]] = {}
+
     for c in target:
-        key = xml_identity_key(c)
-        key_map.setdefault(key, []).append(c)
+        key = identity_key(c)
+        if key[0] == "unique":
+            uniques.setdefault(c.tag, []).append(c)
+        else:
+            key_map_setdefault(key, []).append(c)
 
     for child in source:
-        key = xml_identity_key(child)
+        key = identity_key(child)
         if key[0] != "unique":
-            targets = key_map.get(key)
+            targets = key_map_get(key)
             if targets:
-                merge_xml_children_nodes(targets[0], child)
+                merge_xml_children_nodes(targets[0], child, cache)
             else:
-                target.append(child)
-                key_map.setdefault(key, []).append(child)
+                append(child)
+                key_map_setdefault(key, []).append(child)
         else:
-            child_sig = element_signature(child)
-
-            existing_list = []
-
-            for k, lst in key_map.items():
-                if k[0] == "unique" and k[1] == child.tag:
-                    existing_list.extend(lst)
-
-            found_equivalent = False
-            for existing in existing_list:
-                if element_signature(existing) == child_sig:
-                    found_equivalent = True
-                    break
-
-            if not found_equivalent:
-                target.append(child)
-                key_map.setdefault(("unique", child.tag), []).append(child)
+            sigs = unique_by_tag.get(child.tag)
+            if sigs is None:
+                sigs = unique_by_tag[child.tag] = {signature(c, cache) for c in uniques.get(child.tag, ())}
+            child_sig = signature(child, cache)
+            if child_sig not in sigs:
+                append(child)
+                sigs.add(child_sig)
 
 
 def merge_ini_files(base: Path, patch: Path, extra: Path, out_file: Path) -> None:
@@ -141,19 +346,25 @@ def merge_ini_files(base: Path, patch: Path, extra: Path, out_file: Path) -> Non
         current = "__root__"
         data[current] = {}
 
+        section = data[current]
         for raw in path.read_text(encoding="utf-8-sig", errors="ignore").splitlines():
             line = raw.strip()
-            if not line or line.startswith("#") or line.startswith(";"):
+            if not line:
+                continue
+
+            first = line[0]
+            if first == "#" or first == ";":
                 continue
 
-            if line.startswith("[") and line.endswith("]"):
+            if first == "[" and line[-1] == "]":
                 current = line[1:-1].strip()
-                data.setdefault(current, {})
+                section = data.setdefault(current, {})
                 continue
 
-            if "=" in line:
-                k, v = line.split("=", 1)
-                data.setdefault(current, {})[k.strip()] = v.strip()
+            # line is already stripped, so only the inner sides of the split need it.
+            k, sep, v = line.partition("=")
+            if sep:
+                section[k.rstrip()] = v.lstrip()
 
         return data
 
@@ -170,7 +381,7 @@ def merge_ini_files(base: Path, patch: Path, extra: Path, out_file: Path) -> Non
                 low[section][k] = v
 
     if not patch.exists() and not extra.exists():
-        shutil.copy(base, out_file)
+        fast_copy(base, out_file)
         return
 
     base_ini = read_ini(base)
@@ -181,18 +392,19 @@ def merge_ini_files(base: Path, patch: Path, extra: Path, out_file: Path) -> Non
     merge_dicts(merged, patch_ini, "patch")
     merge_dicts(merged, extra_ini, "extra")
 
+    parts: list[str] = []
+    root = merged.pop("__root__", None)
+    if root:
+        parts.extend(f"{k} = {v}\n" for k, v in sorted(root.items()))
+        parts.append("\n")
+
+    for section in sorted(merged):
+        parts.append(f"[{section}]\n")
+        parts.extend(f"{k} = {v}\n" for k, v in sorted(merged[section].items()))
+        parts.append("\n")
+
     out_file.parent.mkdir(parents=True, exist_ok=True)
-    with out_file.open("w", encoding="utf-8", newline="\n") as f:
-        if "__root__" in merged and merged["__root__"]:
-            for k, v in sorted(merged["__root__"].items()):
-                f.write(f"{k} = {v}\n")
-            f.write("\n")
-
-        for section in sorted(s for s in merged.keys() if s != "__root__"):
-            f.write(f"[{section}]\n")
-            for k, v in sorted(merged[section].items()):
-                f.write(f"{k} = {v}\n")
-            f.write("\n")
+    out_file.write_text("".join(parts), encoding="utf-8", newline="\n")
 
 def merge_file_triple(base: Path, patch: Path, extra: Path, dest: Path) -> None:
     """Merge or copy directly into dest (no temp files)."""
@@ -202,44 +414,76 @@ def merge_file_triple(base: Path, patch: Path, extra: Path, dest: Path) -> None:
         return
 
     dest.parent.mkdir(parents=True, exist_ok=True)
+    _MERGE_HANDLERS.get(suffix, copy_highest_layer)(base, patch, extra, dest)
+
+
+def merge_xml_layers(base: Path, patch: Path, extra: Path, dest: Path) -> None:
+    """Merge the catalog XML layers, map < patch < extra."""
+    merge_catalog_files([base, patch, extra], dest)
+
+
+def copy_highest_layer(base: Path, patch: Path, extra: Path, dest: Path) -> None:
+    """Files that cannot be merged are taken from the highest layer that has them."""
+    src = extra if extra.exists() else patch if patch.exists() else base
+    fast_copy(src, dest)
 
-    if suffix == ".xml":
-        if base.exists():
-            shutil.copy(base, dest)
-            
-        if patch.exists():
-            merge_catalog_xml(dest, patch, dest)
-        if extra.exists():
-            merge_catalog_xml(dest, extra, dest)
-    elif suffix in [".txt", ".ini"]:
-        merge_ini_files(base, patch, extra, dest)
-    else:
-        src = extra if extra.exists() else patch if patch.exists() else base
-        shutil.copy(src, dest)
+
+# File suffix -> merge function; any other suffix falls back to copy_highest_layer.
+_MERGE_HANDLERS: dict[str, Callable[[Path, Path, Path, Path], None]] = {
+    ".xml": merge_xml_layers,
+    ".txt": merge_ini_files,
+    ".ini": merge_ini_files,
+}
+
+
+def walk_files(root: Path) -> Iterator[str]:
+    """Yield the paths of all files below root, relative to it and "/"-separated."""
+    stack = [("", str(root))]
+    while stack:
+        rel, folder = stack.pop()
+        with os.scandir(folder) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((rel + entry.name + "/", entry.path))
+                elif entry.is_file():
+                    yield rel + entry.name
 
 
 def merge_all(map_dir: Path, patch_dir: Path, extra_dir: Path, out_dir: Path) -> None:
     """Merge map < patch < extra directly into out_dir."""
     print(f"🔧 Merging map ({map_dir.name}) < patch ({patch_dir.name}) < extra ({extra_dir.name})")
 
-    all_files: set[Path] = set()
+    all_files: set[str] = set()
     for src in [map_dir, patch_dir, extra_dir]:
         if src.exists():
-            for f in src.rglob("*"):
-                if f.is_file():
-                    rel = f.relative_to(src)
-                    all_files.add(rel)
+            all_files.update(walk_files(src))
+
+    # Largest files first so a big catalog does not finish last on a single worker.
+    layers = (map_dir, patch_dir, extra_dir)
+    jobs = sorted(all_files, key=lambda rel: (-_layer_size(layers, rel), rel))
 
-    for rel in sorted(all_files):
-        base = map_dir / rel
-        patch = patch_dir / rel
-        extra = extra_dir / rel
-        dest = out_dir / rel
-        merge_file_triple(base, patch, extra, dest)
+    merge_one = partial(_merge_one, map_dir, patch_dir, extra_dir, out_dir)
+    with ProcessPoolExecutor() as executor:
+        list(executor.map(merge_one, jobs, chunksize=8))
+
+
+def _merge_one(map_dir: Path, patch_dir: Path, extra_dir: Path, out_dir: Path, rel: str) -> None:
+    merge_file_triple(map_dir / rel, patch_dir / rel, extra_dir / rel, out_dir / rel)
+
+
+def _layer_size(layers: tuple[Path, ...], rel: str) -> int:
+    """Size of the largest copy of rel among the layers."""
+    size = 0
+    for layer in layers:
+        try:
+            size = max(size, os.stat(os.path.join(layer, rel)).st_size)
+        except FileNotFoundError:
+            pass
+    return size
 
 
 def pack_map_folder(src_folder: Path, out_file: Path, force: bool = False) -> None:
-    """Pack a map folder into a .SC2Map (MPQ) using Docker + mpqcli."""
+    """Pack a map folder into a .SC2Map (MPQ) using mpqcli, locally installed or through Docker."""
     src_folder = src_folder.resolve()
     out_file = out_file.resolve()
 
@@ -253,6 +497,15 @@ def pack_map_folder(src_folder: Path, out_file: Path, force: bool = False) -> No
         else:
             raise FileExistsError(f"Output exists: {out_file}. Use --force to overwrite.")
 
+    mpqcli = shutil.which("mpqcli")
+    if mpqcli:
+        print(f"🗜️  Using local mpqcli ({mpqcli}) to pack map → MPQ")
+        subprocess.run([mpqcli, "create", str(src_folder), "--output", str(out_file)], check=True)
+        if not out_file.exists():
+            raise RuntimeError("mpqcli did not produce an MPQ file!")
+        print(f"✅ Packed SC2Map created → {out_file}")
+        return
+
     print("🐳 Using Docker (ghcr.io/thegraydot/mpqcli:latest) to pack map → MPQ")
     with tempfile.TemporaryDirectory() as tmpdir:
         tmpdir = Path(tmpdir)
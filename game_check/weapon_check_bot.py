@@ -1,6 +1,7 @@
 import abc
 import argparse
 import sys
+from typing import Optional
 
 from loser_bot import LoserBot
 from sc2 import maps
@@ -11,8 +12,9 @@ from sc2.ids.buff_id import BuffId
 from sc2.ids.unit_typeid import UnitTypeId
 from sc2.main import run_game
 from sc2.player import Bot
+from sc2.unit import Unit
 
-SKIP_TARGET_UNITS = {
+SKIP_TARGET_UNITS = frozenset({
     UnitTypeId.SCV,
     UnitTypeId.PROBE,
     UnitTypeId.DRONE,
@@ -21,9 +23,9 @@ SKIP_TARGET_UNITS = {
     UnitTypeId.LOCUSTMP,
     UnitTypeId.LOCUSTMPFLYING,
     UnitTypeId.BROODLING,
-}
+})
 
-FLYING_TYPES = {
+FLYING_TYPES = frozenset({
     # Terran
     UnitTypeId.MEDIVAC,
     UnitTypeId.VIKINGFIGHTER,
@@ -45,7 +47,7 @@ FLYING_TYPES = {
     UnitTypeId.BROODLORD,
     UnitTypeId.VIPER,
     UnitTypeId.LOCUSTMPFLYING,
-}
+})
 
 EXPECTED_WEAPONS = {
     # Terran
@@ -116,32 +118,55 @@ EXPECTED_WEAPONS = {
     UnitTypeId.BUNKER: 0,
 }
 
+# Proto weapon and unit data carry raw ints, map them back without going through the enum constructors.
+TARGET_TYPE_BY_VALUE = {t.value: t for t in TargetType}
+ATTRIBUTE_BY_VALUE = {a.value: a for a in Attribute}
 
-def debug_weapons(weapons):
+
+def debug_weapons(weapons, report=print):
     for i, w in enumerate(weapons, start=1):
-        try:
-            target_type = TargetType(w.type).name
-        except ValueError:
-            target_type = f"UNKNOWN({w.type})"
-        print(
+        target_type = TARGET_TYPE_BY_VALUE.get(w.type)
+        target_type = target_type.name if target_type else f"UNKNOWN({w.type})"
+        report(
             f"Weapon {i}: Type={target_type}, Damage={w.damage}, Range={w.range}, Attacks={w.attacks}, Speed={w.speed}")
         if w.damage_bonus:
             for b in w.damage_bonus:
-                try:
-                    attr_name = Attribute(b.attribute).name
-                except ValueError:
-                    attr_name = f"UNKNOWN({b.attribute})"
-                print(f"  Bonus vs {attr_name}: +{b.bonus}")
+                attr = ATTRIBUTE_BY_VALUE.get(b.attribute)
+                attr_name = attr.name if attr else f"UNKNOWN({b.attribute})"
+                report(f"  Bonus vs {attr_name}: +{b.bonus}")
         else:
-            print("  No damage bonus")
+            report("  No damage bonus")
+
+
+def attribute_mask(attributes) -> int:
+    """Pack raw attribute values into a bitmask, so overlap checks are a single `&`."""
+    mask = 0
+    for a in attributes:
+        mask |= 1 << a
+    return mask
 
 
 class UnitValidator(abc.ABC):
+    __slots__ = ("unit_type", "expected_weapons", "weapons")
+
+    # Weapon counts come from static game data unless the validator has to act on a live unit first.
+    requires_spawn = False
 
     def __init__(self, unit_type: UnitTypeId):
         self.unit_type = unit_type
+        self.expected_weapons = EXPECTED_WEAPONS.get(unit_type, 0)
+        self.weapons = []
+
+    def load_weapons(self, bot):
+        # Weapon data is static for the unit type, resolve it once for every validate step.
+        self.weapons = list(bot.game_data.units[self.unit_type.value]._proto.weapons)
+
+    def spawn_data(self, bot) -> list:
+        """Debug spawn rows needed before the validator can start."""
+        return []
 
     async def create(self, bot):
+        bot.pending_spawns.extend(self.spawn_data(bot))
         return True
 
     async def prepare(self, bot):
@@ -153,7 +178,24 @@ class UnitValidator(abc.ABC):
         ...
 
 
+class WeaponTest:
+    __slots__ = ("attacker_type", "target_type", "target_spawned", "attacker_spawned",
+                 "expected_damage", "attacks", "attacker_tag", "target_tag")
+
+    def __init__(self, attacker_type: UnitTypeId, target_type: UnitTypeId, expected_damage: float, attacks: int):
+        self.attacker_type = attacker_type
+        self.target_type = target_type
+        self.target_spawned = False
+        self.attacker_spawned = False
+        self.expected_damage = expected_damage
+        self.attacks = attacks
+        self.attacker_tag = None
+        self.target_tag = None
+
+
 class WeaponValidator(UnitValidator):
+    __slots__ = ("tests", "current_test", "started", "wait_frames", "start_hp", "killed_broodlings")
+
     def __init__(self, unit_type: UnitTypeId):
         super().__init__(unit_type)
         self.tests = []
@@ -161,120 +203,67 @@ class WeaponValidator(UnitValidator):
         self.started = False
         self.wait_frames = 0
         self.start_hp = 0
+        self.killed_broodlings: set[int] = set()
 
     async def create(self, bot):
-        data = bot.game_data.units[self.unit_type.value]
-        weapons = data._proto.weapons
+        # Weapon counts were already checked against game data by WeaponTestBot.check_static_weapons.
+        self.load_weapons(bot)
 
-        for w in weapons:
-            target_type = TargetType(w.type)
+        for w in self.weapons:
+            target_type = TARGET_TYPE_BY_VALUE[w.type]
 
             skip_attributes = [b.attribute for b in w.damage_bonus]
             base_target = bot.pick_unit_without_attribute_no_armor(target_type, skip_attributes)
             if base_target is None:
-                print(f"Fail to find a valid target type for {self.unit_type.name}")
+                bot.report(f"Fail to find a valid target type for {self.unit_type.name}")
                 continue
 
             attacks = w.attacks
             if self.unit_type == UnitTypeId.BROODLORD:
                 attacks = 2
 
-            self.tests.append({
-                "attacker_type": self.unit_type,
-                "target_type": base_target,
-                "target_spawned": False,
-                "attacker_spawned": False,
-                "expected_damage": w.damage * attacks,
-                "attacks": attacks,
-                "attacker_tag": None,
-                "target_tag": None,
-            })
+            self.tests.append(WeaponTest(self.unit_type, base_target, w.damage * attacks, attacks))
 
             for bonus in w.damage_bonus:
-                attr = Attribute(bonus.attribute)
+                attr = ATTRIBUTE_BY_VALUE[bonus.attribute]
                 bonus_target = bot.pick_unit_with_attribute_no_armor(target_type, attr)
                 if bonus_target is None:
                     continue
-                self.tests.append({
-                    "target_type": bonus_target,
-                    "target_spawned": False,
-                    "attacker_spawned": False,
-                    "expected_damage": (w.damage + bonus.bonus) * attacks,
-                    "attacks": attacks,
-                    "attacker_tag": None,
-                    "target_tag": None,
-                })
-
-    async def prepare(self, bot):
-        return True
+                self.tests.append(WeaponTest(self.unit_type, bonus_target, (w.damage + bonus.bonus) * attacks, attacks))
 
     async def validate(self, bot):
-        data = bot.game_data.units[self.unit_type.value]
-        weapons = data._proto.weapons
-        expected = EXPECTED_WEAPONS.get(self.unit_type, 0)
-        actual = len(weapons)
-        if actual != expected:
-            print(f"❌ {self.unit_type.name} weapons mismatch")
-            debug_weapons(weapons)
-            return True, True
-
         if self.current_test >= len(self.tests):
             return True, False
 
         test = self.tests[self.current_test]
 
-        if not test["attacker_tag"]:
-            units = bot.all_own_units.of_type(self.unit_type)
-            if units:
-                test["attacker_tag"] = units.first.tag
-                test["attacker_spawned"] = True
-                return False, False
-            elif not test["attacker_spawned"]:
-                test["attacker_spawned"] = True
-                attacker_pos = bot.start_location.towards(bot.game_info.map_center, 2)
-                await bot.client.debug_create_unit([[self.unit_type, 1, attacker_pos, bot.player_id]])
-                return False, False
-            else:
-                return False, False
+        if not self._ensure_attacker(bot, test):
+            return False, False
 
-        attacker = bot.all_units.find_by_tag(test["attacker_tag"])
+        attacker = bot.units_by_tag.get(test.attacker_tag)
 
         if not attacker and self.unit_type != UnitTypeId.BANELING:
-            print(f"❌ {self.unit_type.name} Attacker killed, target {test['target_type']}. Can't test dmg")
-            data = bot.game_data.units[self.unit_type.value]
-            weapons = data._proto.weapons
-            debug_weapons(weapons)
+            bot.report(f"❌ {self.unit_type.name} Attacker killed, target {test.target_type}. Can't test dmg")
+            debug_weapons(self.weapons, bot.report)
             return True, True
 
-        if test["target_tag"] is None and attacker:
-            target_type = test["target_type"]
-            if not test["target_spawned"]:
-                if self.unit_type in [UnitTypeId.WIDOWMINEBURROWED, UnitTypeId.INTERCEPTOR]:
-                    player_id = 2
-                    target_pos = attacker.position.towards(bot.game_info.map_center, 7)
-                else:
-                    player_id = 1
-                    target_pos = attacker.position.towards(bot.game_info.map_center, 2)
-                await bot.client.debug_create_unit([[target_type, 1, target_pos, player_id]])
-                test["target_spawned"] = True
-            enemy_units = bot.all_units.of_type(target_type).filter(lambda unit: unit.tag != attacker.tag)
-            if enemy_units:
-                enemy_unit = enemy_units.first
-                test["target_tag"] = enemy_unit.tag
-            else:
-                return False, False
+        if not self._ensure_target(bot, test, attacker):
+            return False, False
 
-        target = bot.all_units.find_by_tag(test["target_tag"])
+        target = bot.units_by_tag.get(test.target_tag)
 
         if not target:
-            print(f"❌ {self.unit_type.name} Target {test['target_type']} killed, can't test dmg")
-            debug_weapons(weapons)
+            bot.report(f"❌ {self.unit_type.name} Target {test.target_type} killed, can't test dmg")
+            debug_weapons(self.weapons, bot.report)
             return True, True
 
         if self.unit_type == UnitTypeId.BROODLORD:
-            alive_tags = [u.tag for u in bot.all_own_units if u.type_id == UnitTypeId.BROODLING]
+            # Broodlings stay visible until the kill applies, don't send their tags twice.
+            alive_tags = [u.tag for u in bot.units_by_type.get(UnitTypeId.BROODLING, ())
+                          if u.is_mine and u.tag not in self.killed_broodlings]
             if alive_tags:
-                await bot.client.debug_kill_unit(alive_tags)
+                self.killed_broodlings.update(alive_tags)
+                bot.pending_kills.extend(alive_tags)
 
         if not self.started:
             self.started = True
@@ -291,89 +280,140 @@ class WeaponValidator(UnitValidator):
             if attacker.is_idle or attacker.order_target != target.tag:
                 attacker.attack(target)
 
-        hp_now = target.health + target.shield
+        return self._check_damage(bot, test, target)
+
+    def _ensure_attacker(self, bot, test: WeaponTest) -> bool:
+        """Spawn or pick up the attacker, True once it was known before this step."""
+        if test.attacker_tag:
+            return True
+        own: Optional[Unit] = next((u for u in bot.units_by_type.get(self.unit_type, ()) if u.is_mine), None)
+        if own:
+            test.attacker_tag = own.tag
+            test.attacker_spawned = True
+        elif not test.attacker_spawned:
+            test.attacker_spawned = True
+            attacker_pos = bot.start_location.towards(bot.game_info.map_center, 2)
+            bot.pending_spawns.append([self.unit_type, 1, attacker_pos, bot.player_id])
+        return False
+
+    def _ensure_target(self, bot, test: WeaponTest, attacker: Optional[Unit]) -> bool:
+        """Spawn or pick up the target, False while it is not on the map yet."""
+        if test.target_tag is not None or not attacker:
+            return True
+        target_type = test.target_type
+        if not test.target_spawned:
+            if self.unit_type in [UnitTypeId.WIDOWMINEBURROWED, UnitTypeId.INTERCEPTOR]:
+                player_id = 2
+                target_pos = attacker.position.towards(bot.game_info.map_center, 7)
+            else:
+                player_id = 1
+                target_pos = attacker.position.towards(bot.game_info.map_center, 2)
+            bot.pending_spawns.append([target_type, 1, target_pos, player_id])
+            test.target_spawned = True
+        enemy_unit: Optional[Unit] = next(
+            (u for u in bot.units_by_type.get(target_type, ()) if u.tag != attacker.tag), None)
+        if enemy_unit is None:
+            return False
+        test.target_tag = enemy_unit.tag
+        return True
+
+    def _check_damage(self, bot, test: WeaponTest, target: Unit) -> tuple[bool, bool]:
+        attacks: int = test.attacks
+        hp_now: float = target.health + target.shield
         if hp_now < self.start_hp:
             self.wait_frames += 1
+            expected: float = test.expected_damage
             # NOTE: Protoss shield does not consider armor
             # NOTE: Widow mine damage ignores armor
             if self.unit_type == UnitTypeId.WIDOWMINEBURROWED:
                 armor = 0
             else:
                 armor = target.armor
-            dmg = self.start_hp - hp_now + (armor * test["attacks"])
-            if abs(dmg - test["expected_damage"]) > 0.1 * test["attacks"]:
-                if self.wait_frames <= test["attacks"] * 5:
+            dmg = self.start_hp - hp_now + (armor * attacks)
+            if abs(dmg - expected) > 0.1 * attacks:
+                if self.wait_frames <= attacks * 5:
                     return False, False
-                data = bot.game_data.units[self.unit_type.value]
-                weapons = data._proto.weapons
-                debug_weapons(weapons)
-                print(
-                    f"❌ {self.unit_type.name} wrong damage vs {target.type_id.name} expected {test['expected_damage']}, got {dmg}")
+                debug_weapons(self.weapons, bot.report)
+                bot.report(
+                    f"❌ {self.unit_type.name} wrong damage vs {target.type_id.name} expected {expected}, got {dmg}")
                 return True, True
-            print(f"✅ {self.unit_type.name} damage OK: {test['expected_damage']}")
+            bot.report(f"✅ {self.unit_type.name} damage OK: {expected}")
             self.current_test += 1
             self.started = False
-            await bot.client.debug_kill_unit([target.tag])
+            bot.pending_kills.append(target.tag)
             return False, False
 
-        if self.wait_frames < test["attacks"] * 5:
+        if self.wait_frames < attacks * 5:
             return False, False
 
-        print(f"⚠️ {self.unit_type.name} attack timeout on {target.type_id.name}")
+        bot.report(f"⚠️ {self.unit_type.name} attack timeout on {target.type_id.name}")
         self.current_test += 1
         self.started = False
         return False, True
 
 
 class WeaponBuffValidator(UnitValidator):
+    __slots__ = ("activated", "wait_steps")
+
+    requires_spawn = True
+
+    configs = {
+        UnitTypeId.VOIDRAY: {"ability": AbilityId.EFFECT_VOIDRAYPRISMATICALIGNMENT,
+                             "buff": BuffId.VOIDRAYSWARMDAMAGEBOOST},
+        UnitTypeId.ORACLE: {"ability": AbilityId.BEHAVIOR_PULSARBEAMON, "buff": BuffId.ORACLEWEAPON},
+    }
+
     def __init__(self, unit_type: UnitTypeId):
         super().__init__(unit_type)
-        self.configs = {
-            UnitTypeId.VOIDRAY: {"ability": AbilityId.EFFECT_VOIDRAYPRISMATICALIGNMENT,
-                                 "buff": BuffId.VOIDRAYSWARMDAMAGEBOOST},
-            UnitTypeId.ORACLE: {"ability": AbilityId.BEHAVIOR_PULSARBEAMON, "buff": BuffId.ORACLEWEAPON},
-        }
         self.activated = False
         self.wait_steps = 0
 
+    def spawn_data(self, bot) -> list:
+        return [[self.unit_type, 1, bot.start_location, bot.player_id]]
+
     async def create(self, bot):
-        await bot.client.debug_create_unit([[self.unit_type, 1, bot.start_location, bot.player_id]])
+        self.load_weapons(bot)
+        return await super().create(bot)
 
     async def prepare(self, bot):
-        units = bot.all_units.of_type(self.unit_type)
-        return bool(units)
+        return bool(bot.units_by_type.get(self.unit_type))
 
     async def validate(self, bot):
-        units = bot.all_units.of_type(self.unit_type)
+        units = bot.units_by_type.get(self.unit_type)
         if not units:
             return False, False
-        unit = units.first
+        unit = units[0]
         if not self.activated:
             ability = self.configs[self.unit_type]["ability"]
             unit(ability)
             self.activated = True
-            print(f"Activated {ability.name} on {self.unit_type.name}")
+            bot.report(f"Activated {ability.name} on {self.unit_type.name}")
             return False, False
         self.wait_steps += 1
         if self.wait_steps < 5:
             return False, False
-        data = bot.game_data.units[self.unit_type.value]
-        weapons = data._proto.weapons
-        expected = EXPECTED_WEAPONS.get(self.unit_type, 0)
+        weapons = self.weapons
+        expected = self.expected_weapons
         actual = len(weapons)
-        has_buff = self.configs[self.unit_type]["buff"] in unit.buffs
+        buffs = unit.buffs
+        has_buff = self.configs[self.unit_type]["buff"] in buffs
         if actual == expected and has_buff:
-            print(f"✅ {self.unit_type.name} weapons OK, buffs {list(unit.buffs)}")
-            debug_weapons(weapons)
+            bot.report(f"✅ {self.unit_type.name} weapons OK, buffs {list(buffs)}")
+            debug_weapons(weapons, bot.report)
         else:
-            print(f"❌ {self.unit_type.name} weapons or buffs mismatch {list(unit.buffs)}")
-            debug_weapons(weapons)
-        return True, actual != expected and has_buff
+            bot.report(f"❌ {self.unit_type.name} weapons or buffs mismatch {list(buffs)}")
+            debug_weapons(weapons, bot.report)
+        return True, actual != expected or not has_buff
 
 
 class BunkerValidator(UnitValidator):
     """Validates bunker weapon scaling with various loaded units."""
 
+    __slots__ = ("current_config", "current_load_idx", "prepare_load", "found_buffs", "bunker_tag", "helper_tags",
+                 "helpers_spawned", "any_missmatch")
+
+    requires_spawn = True
+
     required_units = [
         UnitTypeId.MARINE,
         UnitTypeId.MARAUDER,
@@ -381,66 +421,68 @@ class BunkerValidator(UnitValidator):
         UnitTypeId.GHOST,
     ]
 
+    configs = (
+        (UnitTypeId.MARINE, 4),
+        (UnitTypeId.MARAUDER, 2),
+        (UnitTypeId.REAPER, 4),
+        (UnitTypeId.GHOST, 2),
+    )
+
     def __init__(self, unit_type: UnitTypeId):
         super().__init__(unit_type)
-        self.configs = [
-            (UnitTypeId.MARINE, 4),
-            (UnitTypeId.MARAUDER, 2),
-            (UnitTypeId.REAPER, 4),
-            (UnitTypeId.GHOST, 2),
-        ]
         self.current_config = 0
         self.current_load_idx = 1
         self.prepare_load = True
-        self.found_buffs = set[BuffId]()
+        self.found_buffs: set[BuffId] = set()
         self.bunker_tag = None
-        self.helper_tags = []
+        self.helper_tags: set[int] = set()
         self.helpers_spawned = False
         self.any_missmatch = False
 
-    async def create(self, bot):
+    def spawn_data(self, bot) -> list:
         spawn_data = [[self.unit_type, 1, bot.start_location, bot.player_id]]
         for unit_type, count in self.configs:
             spawn_data.append([unit_type, count, bot.start_location, bot.player_id])
-        await bot.client.debug_create_unit(spawn_data)
-        return []
+        return spawn_data
 
     async def prepare(self, bot):
-        bunkers = bot.all_units.of_type(self.unit_type)
+        bunkers = bot.units_by_type.get(self.unit_type)
         if not bunkers:
             return False
 
-        self.bunker_tag = bunkers.first.tag
+        self.bunker_tag = bunkers[0].tag
 
         if not self.helpers_spawned:
             for unit_type, count in self.configs:
-                units = bot.all_units.of_type(unit_type)
-                if len(units) < count:
+                if len(bot.units_by_type.get(unit_type, ())) < count:
                     return False
             self.helpers_spawned = True
         return True
 
     async def validate(self, bot):
-        bunker = bot.all_units.find_by_tag(self.bunker_tag)
+        bunker = bot.units_by_tag.get(self.bunker_tag)
         if not bunker:
             return False, False
 
-        if self.current_config >= len(self.configs):
-            print(f"🏁 Finished bunker validation. Failed: {self.any_missmatch}")
+        configs = self.configs
+        current_config = self.current_config
+        if current_config >= len(configs):
+            bot.report(f"🏁 Finished bunker validation. Failed: {self.any_missmatch}")
             return True, self.any_missmatch
 
-        unit_type, load_counts = self.configs[self.current_config]
-        if self.current_load_idx > load_counts:
+        unit_type, load_counts = configs[current_config]
+        load_idx = self.current_load_idx
+        if load_idx > load_counts:
             buffs = self.found_buffs
 
             if load_counts == len(buffs):
-                print(f"✅ {unit_type.name} bunker buffs OK: ({list(buffs)})")
+                bot.report(f"✅ {unit_type.name} bunker buffs OK: ({list(buffs)})")
             else:
-                print(f"❌ {unit_type.name} bunker buff missmatch: {len(buffs)}/{load_counts} {list(buffs)}")
+                bot.report(f"❌ {unit_type.name} bunker buff missmatch: {len(buffs)}/{load_counts} {list(buffs)}")
                 self.any_missmatch = True
 
             self.found_buffs.clear()
-            self.current_config += 1
+            self.current_config = current_config + 1
             self.current_load_idx = 1
             self.prepare_load = True
             return False, False
@@ -449,28 +491,28 @@ class BunkerValidator(UnitValidator):
             if bunker.cargo_used > 0:
                 bunker(AbilityId.UNLOADALL)
                 return False, False
-            helpers = bot.all_units.of_type(unit_type).take(self.current_load_idx)
-            if len(helpers) >= self.current_load_idx:
-                self.helper_tags = [u.tag for u in helpers]
+            pool = bot.units_by_type.get(unit_type, ())
+            if len(pool) >= load_idx:
+                self.helper_tags = {u.tag for u in pool[:load_idx]}
                 self.prepare_load = False
             return False, False
         else:
-            helpers = bot.all_units.tags_in(self.helper_tags)
-            if helpers:
-                unit_to_load = helpers.first
+            units_by_tag = bot.units_by_tag
+            unit_to_load = next((units_by_tag[t] for t in self.helper_tags if t in units_by_tag), None)
+            if unit_to_load:
                 bunker(AbilityId.LOAD, unit_to_load)
                 return False, False
-            # buffs = [buff for buff in bunker.buffs if buff not in self.found_buffs]
             data = bot.game_data.units[unit_type.value]
             cargo_size = data._proto.cargo_size
-            if bunker.cargo_used < cargo_size * self.current_load_idx:
+            if bunker.cargo_used < cargo_size * load_idx:
                 return False, False
 
-        if len(bunker.buffs) > 1:
-            print(f"❌ {unit_type.name} bunker buff missmatch: {len(bunker.buffs)}/1 {list(bunker.buffs)}")
-        self.found_buffs.update(bunker.buffs)
+        bunker_buffs = bunker.buffs
+        if len(bunker_buffs) > 1:
+            bot.report(f"❌ {unit_type.name} bunker buff missmatch: {len(bunker_buffs)}/1 {list(bunker_buffs)}")
+        self.found_buffs |= bunker_buffs
         self.prepare_load = True
-        self.current_load_idx += 1
+        self.current_load_idx = load_idx + 1
         return False, False
 
 
@@ -482,16 +524,18 @@ class ValidatorManager:
             UnitTypeId.BUNKER: BunkerValidator,
         }
 
+    def get_validator_class(self, unit_type):
+        return self.validators.get(unit_type, WeaponValidator)
+
     def get_validator(self, unit_type):
-        cls = self.validators.get(unit_type, WeaponValidator)
-        return cls(unit_type)
+        return self.get_validator_class(unit_type)(unit_type)
 
 
 class WeaponTestBot(BotAI):
     def __init__(self, validation_timeout=300):
         super().__init__()
-        self.unit_types = list(EXPECTED_WEAPONS.keys())
-        self.current_index = 0
+        self.unit_types_left = iter(EXPECTED_WEAPONS)
+        self.static_checked = False
         self.validation_timeout = validation_timeout
         self.current_validator = None
         self.cleanup_pending = True
@@ -502,6 +546,18 @@ class WeaponTestBot(BotAI):
         self.units_ground = []
         self.units_air = []
         self.units_by_attribute = {}
+        self.unit_attribute_masks: dict[UnitTypeId, int] = {}
+        self.unit_armor: dict[UnitTypeId, float] = {}
+        self.ground_targets_by_attribute: dict[Attribute, tuple[UnitTypeId, ...]] = {}
+        self.air_targets_by_attribute: dict[Attribute, tuple[UnitTypeId, ...]] = {}
+        self.any_targets_by_attribute: dict[Attribute, tuple[UnitTypeId, ...]] = {}
+        self.units_by_type: dict[UnitTypeId, list[Unit]] = {}
+        self.units_by_tag: dict[int, Unit] = {}
+        # Debug commands from the validators, flushed at the end of on_step.
+        self.pending_spawns: list[list] = []
+        self.pending_kills: list[int] = []
+        # Report lines, written out in one go when the sweep ends.
+        self.results: list[str] = []
 
     def build_unit_attribute_index(self):
         if self.units_ground:
@@ -510,11 +566,17 @@ class WeaponTestBot(BotAI):
         self.units_ground = []
         self.units_air = []
         self.units_by_attribute = {}
+        self.unit_attribute_masks = {}
+        self.unit_armor = {}
+        self.ground_targets_by_attribute = {}
+        self.air_targets_by_attribute = {}
+        self.any_targets_by_attribute = {}
 
         ground_list = []
         air_list = []
+        supply_by_unit: dict[UnitTypeId, float] = {}
 
-        for ut in self.unit_types:
+        for ut in EXPECTED_WEAPONS:
             proto = self.game_data.units[ut.value]._proto
 
             if proto.armor != 0 and proto.race == 3:
@@ -523,6 +585,9 @@ class WeaponTestBot(BotAI):
                 continue
 
             supply = proto.food_required
+            supply_by_unit[ut] = supply
+            self.unit_attribute_masks[ut] = attribute_mask(proto.attributes)
+            self.unit_armor[ut] = proto.armor
 
             if ut in FLYING_TYPES:
                 air_list.append((ut, supply))
@@ -530,7 +595,7 @@ class WeaponTestBot(BotAI):
                 ground_list.append((ut, supply))
 
             for attr_val in proto.attributes:
-                self.units_by_attribute.setdefault(Attribute(attr_val), []).append(ut)
+                self.units_by_attribute.setdefault(ATTRIBUTE_BY_VALUE[attr_val], []).append(ut)
 
         ground_list.sort(key=lambda x: x[1], reverse=True)
         air_list.sort(key=lambda x: x[1], reverse=True)
@@ -539,17 +604,46 @@ class WeaponTestBot(BotAI):
         self.units_air = [ut for ut, hp in air_list]
 
         for attr, lst in self.units_by_attribute.items():
-            lst.sort(
-                key=lambda ut: (
-                        self.game_data.units[ut.value]._proto.food_required
-                ),
-                reverse=True,
-            )
+            lst.sort(key=supply_by_unit.__getitem__, reverse=True)
+
+        # Unarmored candidates per attribute, split by target type and kept in supply order.
+        ground = set(self.units_ground)
+        air = set(self.units_air)
+        for attr, lst in self.units_by_attribute.items():
+            unarmored = tuple(ut for ut in lst if self.unit_armor[ut] == 0)
+            self.ground_targets_by_attribute[attr] = tuple(ut for ut in unarmored if ut in ground)
+            self.air_targets_by_attribute[attr] = tuple(ut for ut in unarmored if ut in air)
+            self.any_targets_by_attribute[attr] = unarmored
+
+
+    def check_static_weapons(self):
+        """Settle weapon count mismatches and unarmed units straight from game data, before spawning anything."""
+        self.static_checked = True
+        remaining = []
+        for ut, expected in EXPECTED_WEAPONS.items():
+            if not self.manager.get_validator_class(ut).requires_spawn:
+                weapons = self.game_data.units[ut.value]._proto.weapons
+                if len(weapons) != expected:
+                    self.report(f"❌ {ut.name} weapons mismatch")
+                    debug_weapons(weapons, self.report)
+                    self.missmatches += 1
+                    continue
+                if not weapons:
+                    # Nothing to fire, the count check above is the whole validation.
+                    continue
+            remaining.append(ut)
+        self.unit_types_left = iter(remaining)
 
+    def index_units(self):
+        """Group this step's units by type and by tag, shared by the validators."""
+        self.units_by_type = {}
+        self.units_by_tag = {}
+        for u in self.all_units:
+            self.units_by_type.setdefault(u.type_id, []).append(u)
+            self.units_by_tag[u.tag] = u
 
     def pick_unit_without_attribute_no_armor(self, target_type, skip_attributes=None):
-        if skip_attributes is None:
-            skip_attributes = []
+        skip = attribute_mask(skip_attributes or ())
 
         if target_type == TargetType.Ground:
             pool = self.units_ground
@@ -559,39 +653,60 @@ class WeaponTestBot(BotAI):
             pool = self.units_ground + self.units_air
 
         for ut in pool:
-            proto = self.game_data.units[ut.value]._proto
-            if any(attr in proto.attributes for attr in skip_attributes):
+            if self.unit_attribute_masks[ut] & skip:
                 continue
             return ut
 
         return None
 
     def pick_unit_with_attribute_no_armor(self, target_type, attr):
-        candidates = self.units_by_attribute.get(attr, [])
-        for ut in candidates:
-            proto = self.game_data.units[ut.value]._proto
-            if proto.armor != 0:
-                continue
-            if target_type == TargetType.Ground and ut not in self.units_ground:
-                continue
-            if target_type == TargetType.Air and ut not in self.units_air:
-                continue
-            return ut
-        return None
+        if target_type == TargetType.Ground:
+            targets = self.ground_targets_by_attribute
+        elif target_type == TargetType.Air:
+            targets = self.air_targets_by_attribute
+        else:
+            targets = self.any_targets_by_attribute
+        return next(iter(targets.get(attr, ())), None)
 
     async def cleanup(self) -> bool:
-        alive_tags = [u.tag for u in self.all_units if u.type_id != UnitTypeId.COMMANDCENTER
-                      and (u.is_mine or u.is_enemy)]
+        alive_tags = [u.tag for ut, units in self.units_by_type.items() if ut != UnitTypeId.COMMANDCENTER
+                      for u in units if u.is_mine or u.is_enemy]
         if alive_tags:
-            await self.client.debug_kill_unit(alive_tags)
+            self.pending_kills.extend(alive_tags)
             return False
 
         return True
 
+    def report(self, message: str):
+        self.results.append(message)
+
+    def flush_results(self):
+        if self.results:
+            sys.stdout.write("\n".join(self.results) + "\n")
+            sys.stdout.flush()
+            self.results = []
+
     async def on_start(self):
         self.client.game_step = 1
 
+    async def on_end(self, game_result):
+        # The game can end before the sweep is done, keep whatever was collected.
+        self.flush_results()
+
+    async def flush_debug_commands(self):
+        """Send the debug kills and spawns queued during this step, one request each."""
+        if self.pending_kills:
+            await self.client.debug_kill_unit(self.pending_kills)
+            self.pending_kills = []
+        if self.pending_spawns:
+            await self.client.debug_create_unit(self.pending_spawns)
+            self.pending_spawns = []
+
     async def on_step(self, iteration: int):
+        await self.run_step(iteration)
+        await self.flush_debug_commands()
+
+    async def run_step(self, iteration: int):
         if self.quit:
             # Waiting game to end
             return
@@ -602,6 +717,9 @@ class WeaponTestBot(BotAI):
 
 
         self.build_unit_attribute_index()
+        if not self.static_checked:
+            self.check_static_weapons()
+        self.index_units()
 
         if self.cleanup_pending:
             if await self.cleanup():
@@ -610,22 +728,22 @@ class WeaponTestBot(BotAI):
                 return
 
         if not self.current_validator:
-            if self.current_index >= len(self.unit_types):
+            target = next(self.unit_types_left, None)
+            if target is None:
                 if self.missmatches > 0:
-                    print(f"❌ Weapon tests failed {self.missmatches} in {self.time} seconds.")
+                    self.report(f"❌ Weapon tests failed {self.missmatches} in {self.time} seconds.")
                 else:
-                    print(f"✅ Weapon test completed in {self.time} seconds.")
+                    self.report(f"✅ Weapon test completed in {self.time} seconds.")
+                self.flush_results()
                 self.done = True
                 return
-            target = self.unit_types[self.current_index]
-            self.current_index += 1
             validator = self.manager.get_validator(target)
             await validator.create(self)
-            self.current_validator = (validator, iteration)
+            self.current_validator = (validator, iteration + self.validation_timeout)
 
-        validator, start_loop = self.current_validator
-        if validator and start_loop + self.validation_timeout <= iteration:
-            print(f"❌ Timeout: {validator.unit_type.name}")
+        validator, deadline = self.current_validator
+        if validator and deadline <= iteration:
+            self.report(f"❌ Timeout: {validator.unit_type.name}")
             self.missmatches += 1
             self.cleanup_pending = True
             self.current_validator = None
@@ -637,7 +755,7 @@ class WeaponTestBot(BotAI):
         if not done:
             return
         if failed:
-            print(f"❌ {validator.unit_type} Validator failed.")
+            self.report(f"❌ {validator.unit_type} Validator failed.")
             self.missmatches += 1
         self.cleanup_pending = True
         self.current_validator = None